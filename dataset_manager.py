@@ -5,20 +5,28 @@ import logging
 # Configure logging for debugging and informational output.
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 
-def update_facts(new_fact, fact_file="data/facts.txt"):
+def update_facts(new_fact, fact_file="data/facts.txt", store=None):
     """
     Update the facts dataset by appending a new fact if it is not already present.
     
     This function reads the current facts from the specified file, checks if the new_fact
     already exists, and if not, appends it to the file. It logs the action taken.
+
+    If a KnowledgeStore is given, the fact is inserted there instead. The store deduplicates
+    with a unique constraint inside a transaction, so concurrent workers cannot race.
     
     Parameters:
         new_fact (str): The new fact to be added to the dataset.
         fact_file (str): The path to the file where facts are stored. Defaults to "data/facts.txt".
+        store (KnowledgeStore, optional): A knowledge store to write to instead of fact_file.
     
     Returns:
         None
     """
+    if store is not None:
+        update_facts_batch([new_fact], store)
+        return
+
     try:
         # Attempt to read existing facts from the file.
         with open(fact_file, "r") as f:
@@ -42,6 +50,28 @@ def update_facts(new_fact, fact_file="data/facts.txt"):
         except Exception as e:
             logging.error(f"Error writing new fact to file: {e}")
 
+def update_facts_batch(new_facts, store):
+    """
+    Add several facts to a knowledge store in a single transaction.
+
+    Facts that already exist in the store are skipped.
+
+    Parameters:
+        new_facts (list): The new facts to be added to the dataset.
+        store (KnowledgeStore): The knowledge store to write to.
+
+    Returns:
+        int: The number of facts that were newly added.
+    """
+    try:
+        added = store.add_facts(new_facts)
+    except Exception as e:
+        logging.error(f"Error writing new facts to the knowledge store: {e}")
+        return 0
+    if added < len(new_facts):
+        logging.info("%d fact(s) already existed in the dataset.", len(new_facts) - added)
+    return added
+
 # For debugging: Test the update_facts function.
 if __name__ == "__main__":
     test_fact = "New observation: stress increases cortisol levels."
@@ -1,19 +1,119 @@
 # embedding_engine.py
 
 from sentence_transformers import SentenceTransformer, util
+from multiprocessing import shared_memory
+import multiprocessing
+import warnings
+import json
+import os
+import numpy as np
+import torch
 import logging
 
 # Configure logging for debugging and informational output.
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Compressed matrices are scored in row blocks of this size to bound the float32 temporaries.
+SCORE_BLOCK_ROWS = 8192
+
+# Per-process state of parallel encoding workers, set up once by _init_encode_worker.
+_worker_model = None
+_worker_output = None
+_worker_shm = None
+
+def _init_encode_worker(model_name, shm_name, shape):
+    """
+    Load a private model copy and attach to the shared output matrix in a pool worker.
+
+    Parameters:
+        model_name (str): Name of the SentenceTransformer model to load.
+        shm_name (str): Name of the shared memory segment holding the output matrix.
+        shape (tuple): (n, dim) shape of the output matrix.
+    """
+    global _worker_model, _worker_output, _worker_shm
+    # Each worker encodes on one core; the pool provides the parallelism.
+    torch.set_num_threads(1)
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_output = np.ndarray(shape, dtype=np.float32, buffer=_worker_shm.buf)
+
+def _encode_chunk(chunk):
+    """
+    Encode one chunk of texts and write the embeddings into the shared output matrix.
+
+    Parameters:
+        chunk (tuple): (start, texts) where start is the row of the first text.
+
+    Returns:
+        int: The number of texts encoded.
+    """
+    start, texts = chunk
+    embeddings = _worker_model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+    _worker_output[start:start + len(texts)] = embeddings
+    return len(texts)
+
+def encode_parallel(texts, dim, num_workers=None, chunk_size=256, model_name=MODEL_NAME):
+    """
+    Encode a large list of texts across a pool of processes.
+
+    The texts are split into chunks of chunk_size. Every worker loads its own model and writes its
+    embeddings straight into a preallocated shared-memory matrix, so only row counts travel back
+    to the parent. Progress is logged in steps of roughly 10%.
+
+    Parameters:
+        texts (list): The texts to encode.
+        dim (int): Embedding dimension of the model.
+        num_workers (int, optional): Number of worker processes. Defaults to the CPU count, and is
+                                     capped at the number of chunks.
+        chunk_size (int): Number of texts per chunk.
+        model_name (str): Name of the SentenceTransformer model the workers load.
+
+    Returns:
+        torch.Tensor: A (len(texts), dim) float32 embedding matrix on the CPU.
+    """
+    shape = (len(texts), dim)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, shape[0] * shape[1] * 4))
+    try:
+        output = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        chunks = [(start, texts[start:start + chunk_size]) for start in range(0, len(texts), chunk_size)]
+        # Every worker loads its own model, so never start more workers than there are chunks.
+        num_workers = max(1, min(num_workers or multiprocessing.cpu_count(), len(chunks)))
+        # "spawn" avoids forking a parent that already holds a loaded model and torch thread pools.
+        context = multiprocessing.get_context("spawn")
+        done = 0
+        next_report = 0.1
+        with context.Pool(num_workers, initializer=_init_encode_worker, initargs=(model_name, shm.name, shape)) as pool:
+            for count in pool.imap_unordered(_encode_chunk, chunks):
+                done += count
+                if done >= next_report * len(texts) or done == len(texts):
+                    logging.info("Encoded %d/%d texts (%.0f%%).", done, len(texts), 100.0 * done / len(texts))
+                    next_report = done / len(texts) + 0.1
+        embeddings = torch.from_numpy(output.copy())
+    finally:
+        # Drop the view into the segment first; a buffer with live exports cannot be closed.
+        output = None
+        shm.close()
+        shm.unlink()
+    return embeddings
+
 class EmbeddingEngine:
     """
     An embedding engine that leverages SentenceTransformer to generate semantic embeddings for concepts and facts.
     
     This module loads concept definitions and factual statements from text files, computes their embeddings,
     and provides methods to retrieve the most semantically related concepts and facts given an observation.
+
+    The embedding matrices can optionally be kept in a compressed form ("float16", or "int8" with one
+    scale per row). Compressed matrices are only used to shortlist candidates; the shortlist is then
+    rescored against exact float32 vectors kept in read-only memory-mapped .npy files, so they
+    stay on disk (or in the page cache) instead of the process heap.
     """
-    def __init__(self, concept_file="data/concepts.txt", fact_file="data/facts.txt"):
+    STORAGE_MODES = ("float32", "float16", "int8")
+
+    def __init__(self, concept_file="data/concepts.txt", fact_file="data/facts.txt", storage="float32", rescore_k=20,
+                 store=None, num_workers=1, chunk_size=256, exact_dir=None):
         """
         Initialize the EmbeddingEngine.
 
@@ -23,18 +123,42 @@ class EmbeddingEngine:
         Parameters:
             concept_file (str): Path to the file containing concept definitions.
             fact_file (str): Path to the file containing factual statements.
+            storage (str): How embedding matrices are stored: "float32" (exact), "float16" or "int8".
+            rescore_k (int): Size of the shortlist rescored at full precision when storage is compressed.
+            store (KnowledgeStore, optional): Read concepts and facts from this store instead of the files,
+                                              and reuse the embeddings cached in it.
+            num_workers (int): Number of processes used to encode the corpus when embeddings are not
+                               cached. Values above 1 enable parallel chunked encoding.
+            chunk_size (int): Number of texts per chunk in parallel encoding.
+            exact_dir (str, optional): Directory for the exact float32 vectors used to rescore when storage
+                                       is compressed. Defaults to ".exact_embeddings" next to the fact file
+                                       (or the knowledge store's database), which keeps them on disk rather
+                                       than in a possibly RAM-backed temporary directory.
         """
-        try:
-            self.model = SentenceTransformer("all-MiniLM-L6-v2")
-            logging.info("SentenceTransformer model loaded successfully.")
-        except Exception as e:
-            logging.error(f"Error loading SentenceTransformer model: {e}")
-            raise e
+        if storage not in self.STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode '{storage}'. Expected one of {self.STORAGE_MODES}.")
+        self.storage = storage
+        self.rescore_k = rescore_k
+        self.concept_scales = None
+        self.fact_scales = None
+        self.concept_exact = None
+        self.fact_exact = None
+        if exact_dir is None and storage != "float32":
+            data_path = store.db_path if store is not None else fact_file
+            exact_dir = os.path.join(os.path.dirname(os.path.abspath(data_path)), ".exact_embeddings")
+        self.exact_dir = exact_dir
+        self.store = store
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+        # True when float32 matrices are already L2-normalized (e.g. attached from an export).
+        self.normalized = False
+        self.model_name = MODEL_NAME
+        self.model = self._load_model()
 
         # Load concepts and their definitions.
         self.concepts, self.definitions = self.load_concepts(concept_file)
         try:
-            self.concept_embeddings = self.model.encode(self.definitions, convert_to_tensor=True)
+            self.concept_embeddings = self._encode_corpus(self.concepts, self.definitions, "concepts")
             logging.info("Concept embeddings computed successfully.")
         except Exception as e:
             logging.error(f"Error encoding concept definitions: {e}")
@@ -43,12 +167,198 @@ class EmbeddingEngine:
         # Load facts and compute their embeddings.
         self.facts = self.load_facts(fact_file)
         try:
-            self.fact_embeddings = self.model.encode(self.facts, convert_to_tensor=True)
+            self.fact_embeddings = self._encode_corpus(self.facts, self.facts, "facts")
             logging.info("Fact embeddings computed successfully.")
         except Exception as e:
             logging.error(f"Error encoding facts: {e}")
             self.fact_embeddings = None
 
+        # Compress the matrices if a reduced-precision storage mode was requested, keeping the exact
+        # vectors memory-mapped for rescoring.
+        if self.storage != "float32":
+            if self.concept_embeddings is not None:
+                self.concept_exact = self._spill_exact(self.concept_embeddings, "concept_exact")
+                self.concept_embeddings, self.concept_scales = self.quantize(self.concept_embeddings, self.storage)
+            if self.fact_embeddings is not None:
+                self.fact_exact = self._spill_exact(self.fact_embeddings, "fact_exact")
+                self.fact_embeddings, self.fact_scales = self.quantize(self.fact_embeddings, self.storage)
+        usage = self.memory_usage()
+        logging.info(
+            "Embedding storage '%s' uses %.1f KiB in memory (%.1f KiB at float32).",
+            self.storage, usage["total_bytes"] / 1024, usage["float32_bytes"] / 1024
+        )
+        if usage["exact_bytes"]:
+            logging.info(
+                "Rescoring vectors take %.1f KiB more, memory-mapped from %s.", usage["exact_bytes"] / 1024, self.exact_dir
+            )
+
+    @staticmethod
+    def _load_model(device=None):
+        """
+        Load the SentenceTransformer model.
+
+        Parameters:
+            device (str, optional): Device to load the model on. Defaults to the library's choice.
+
+        Returns:
+            SentenceTransformer: The loaded model.
+        """
+        try:
+            model = SentenceTransformer(MODEL_NAME, device=device)
+            logging.info("SentenceTransformer model loaded successfully.")
+            return model
+        except Exception as e:
+            logging.error(f"Error loading SentenceTransformer model: {e}")
+            raise e
+
+    @staticmethod
+    def _map_matrix(path):
+        """
+        Memory-map a .npy matrix read-only as a tensor, without copying it.
+
+        Parameters:
+            path (str): Path of the .npy file.
+
+        Returns:
+            torch.Tensor: A tensor backed by the read-only memory map.
+        """
+        array = np.load(path, mmap_mode='r')
+        # torch warns about read-only arrays; the engine never writes to these matrices.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            return torch.from_numpy(array)
+
+    @staticmethod
+    def _replace_file(path, write):
+        """
+        Write a file next to its destination and atomically rename it into place.
+
+        The old file may still be memory-mapped, by this engine or by attached workers, and may even
+        be the source of the data being written. Replacing it by rename leaves existing maps
+        pointing at the old, intact file instead of truncating it underneath them.
+
+        Parameters:
+            path (str): Destination path.
+            write (callable): Called with a binary file object to write the contents.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _spill_exact(self, embeddings, name):
+        """
+        Write L2-normalized float32 vectors to exact_dir and map them back read-only.
+
+        Parameters:
+            embeddings (torch.Tensor): A (n, dim) float matrix.
+            name (str): File name (without extension) inside exact_dir.
+
+        Returns:
+            torch.Tensor: The normalized vectors, backed by a read-only memory map.
+        """
+        os.makedirs(self.exact_dir, exist_ok=True)
+        path = os.path.join(self.exact_dir, f"{name}.npy")
+        normalized = torch.nn.functional.normalize(embeddings.float(), dim=1)
+        array = normalized.detach().cpu().numpy()
+        self._replace_file(path, lambda f: np.save(f, array))
+        return self._map_matrix(path)
+
+    def export_embeddings(self, directory):
+        """
+        Export the embedding matrices and corpus texts for read-only sharing between processes.
+
+        Each matrix is written as a .npy file next to a manifest.json holding the texts and storage
+        mode. Float32 matrices are L2-normalized on export so that attached engines can score them
+        with a plain matrix product. Placing the directory on a tmpfs such as /dev/shm keeps the
+        segment in shared memory rather than on disk.
+
+        Every file is replaced atomically and the manifest is written last, so re-exporting into a
+        directory that this engine or running workers have attached to is safe: existing maps keep
+        reading the previous files.
+
+        Parameters:
+            directory (str): Destination directory; created if it does not exist.
+        """
+        os.makedirs(directory, exist_ok=True)
+        matrices = {
+            "concept_embeddings": self.concept_embeddings,
+            "concept_scales": self.concept_scales,
+            "fact_embeddings": self.fact_embeddings,
+            "fact_scales": self.fact_scales,
+            "concept_exact": self.concept_exact,
+            "fact_exact": self.fact_exact,
+        }
+        for name, tensor in matrices.items():
+            if tensor is None:
+                continue
+            if self.storage == "float32" and name.endswith("_embeddings") and not self.normalized:
+                tensor = torch.nn.functional.normalize(tensor.float(), dim=1)
+            array = tensor.detach().cpu().numpy()
+            self._replace_file(os.path.join(directory, f"{name}.npy"), lambda f, array=array: np.save(f, array))
+        manifest = {
+            "model": MODEL_NAME,
+            "storage": self.storage,
+            "concepts": self.concepts,
+            "definitions": self.definitions,
+            "facts": self.facts,
+            "matrices": [name for name, tensor in matrices.items() if tensor is not None],
+        }
+        self._replace_file(
+            os.path.join(directory, "manifest.json"), lambda f: f.write(json.dumps(manifest).encode("utf-8"))
+        )
+        logging.info("Exported embeddings to %s", directory)
+
+    @classmethod
+    def attach(cls, directory, rescore_k=20):
+        """
+        Create an engine on top of matrices written by export_embeddings, without copying them.
+
+        The matrices are memory-mapped read-only, so every process attached to the same export
+        shares one copy through the operating system's page cache. Only the model is loaded per
+        process; it is placed on the CPU because moving the matrices to another device would copy them.
+
+        Parameters:
+            directory (str): Directory previously written by export_embeddings.
+            rescore_k (int): Size of the shortlist rescored at full precision when storage is compressed.
+
+        Returns:
+            EmbeddingEngine: An engine whose embedding matrices are read-only memory maps.
+        """
+        with open(os.path.join(directory, "manifest.json"), 'r') as f:
+            manifest = json.load(f)
+        if manifest["model"] != MODEL_NAME:
+            raise ValueError(f"Export was made with model '{manifest['model']}', expected '{MODEL_NAME}'.")
+
+        engine = cls.__new__(cls)
+        engine.storage = manifest["storage"]
+        engine.rescore_k = rescore_k
+        engine.store = None
+        engine.exact_dir = directory
+        engine.num_workers = 1
+        engine.chunk_size = 256
+        engine.normalized = True
+        engine.model_name = MODEL_NAME
+        engine.model = cls._load_model(device="cpu")
+        engine.concepts = manifest["concepts"]
+        engine.definitions = manifest["definitions"]
+        engine.facts = manifest["facts"]
+        for name in ("concept_embeddings", "concept_scales", "fact_embeddings", "fact_scales",
+                     "concept_exact", "fact_exact"):
+            tensor = None
+            if name in manifest["matrices"]:
+                tensor = cls._map_matrix(os.path.join(directory, f"{name}.npy"))
+            setattr(engine, name, tensor)
+        logging.info(
+            "Attached to %d concept and %d fact embeddings in %s", len(engine.concepts), len(engine.facts), directory
+        )
+        return engine
+
     def load_concepts(self, path):
         """
         Load concept names and definitions from a specified file.
@@ -57,12 +367,23 @@ class EmbeddingEngine:
         separated by a colon (":"). For example:
             memory_loss: A decline in the ability to encode, store, or retrieve information.
 
+        If the engine was given a knowledge store, the concepts are read from the store and path is ignored.
+
         Parameters:
             path (str): Path to the concepts file.
 
         Returns:
             tuple: Two lists - one containing concept names and the other containing definitions.
         """
+        if self.store is not None:
+            try:
+                concepts, definitions = self.store.get_concepts()
+                logging.info("Loaded %d concepts from %s", len(concepts), self.store.db_path)
+                return concepts, definitions
+            except Exception as e:
+                logging.error(f"Failed to load concepts from the knowledge store: {e}")
+                return [], []
+
         concepts = []
         definitions = []
         try:
@@ -84,7 +405,8 @@ class EmbeddingEngine:
         """
         Load factual statements from a specified file.
 
-        Each non-empty line in the file should contain a fact.
+        Each non-empty line in the file should contain a fact. If the engine was given a knowledge
+        store, the facts are read from the store and path is ignored.
         
         Parameters:
             path (str): Path to the facts file.
@@ -92,6 +414,15 @@ class EmbeddingEngine:
         Returns:
             list: A list of fact strings.
         """
+        if self.store is not None:
+            try:
+                facts = self.store.get_facts()
+                logging.info("Loaded %d facts from %s", len(facts), self.store.db_path)
+                return facts
+            except Exception as e:
+                logging.error(f"Failed to load facts from the knowledge store: {e}")
+                return []
+
         try:
             with open(path, 'r') as f:
                 facts = [line.strip() for line in f if line.strip()]
@@ -101,6 +432,237 @@ class EmbeddingEngine:
             logging.error(f"Failed to load facts from {path}: {e}")
             return []
 
+    def _encode_corpus(self, keys, texts, kind):
+        """
+        Encode a corpus, reusing embeddings cached in the knowledge store when one is configured.
+
+        Only texts without a stored embedding are encoded; their embeddings are written back to the
+        store so that the next start is warm.
+
+        Parameters:
+            keys (list): Store keys for each text (concept names or fact texts).
+            texts (list): The texts to encode.
+            kind (str): Either "concepts" or "facts".
+
+        Returns:
+            torch.Tensor: A (n, dim) float32 embedding matrix.
+        """
+        if self.store is None:
+            return self._encode_texts(texts)
+
+        cached = self.store.load_embeddings(kind)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        logging.info("Reusing %d stored %s embeddings, encoding %d.", len(keys) - len(missing), kind, len(missing))
+        rows = [None] * len(keys)
+        for i, key in enumerate(keys):
+            if key in cached:
+                rows[i] = torch.frombuffer(bytearray(cached[key]), dtype=torch.float32)
+        if missing:
+            encoded = self._encode_texts([texts[i] for i in missing]).float().cpu()
+            for i, embedding in zip(missing, encoded):
+                rows[i] = embedding
+            self.store.save_embeddings(kind, [(keys[i], rows[i].numpy().tobytes()) for i in missing])
+        if not rows:
+            return torch.empty((0, self.model.get_sentence_embedding_dimension()))
+        return torch.stack(rows).to(self.model.device)
+
+    def _encode_texts(self, texts):
+        """
+        Encode corpus texts, in parallel when num_workers > 1 and the corpus spans several chunks.
+
+        Parameters:
+            texts (list): The texts to encode.
+
+        Returns:
+            torch.Tensor: A (n, dim) float32 embedding matrix.
+        """
+        if self.num_workers > 1 and len(texts) > self.chunk_size:
+            dim = self.model.get_sentence_embedding_dimension()
+            embeddings = encode_parallel(texts, dim, self.num_workers, self.chunk_size)
+            return embeddings.to(self.model.device)
+        return self.model.encode(texts, convert_to_tensor=True)
+
+    @staticmethod
+    def quantize(embeddings, storage):
+        """
+        Compress an embedding matrix for reduced-precision storage.
+
+        Rows are L2-normalized first so that a dot product against a normalized query equals the
+        cosine similarity. For "int8", each row is scaled by its own max absolute value so that it
+        fits into [-127, 127]; the per-row scales are returned alongside the matrix.
+
+        Parameters:
+            embeddings (torch.Tensor): A (n, dim) float matrix.
+            storage (str): Either "float16" or "int8".
+
+        Returns:
+            tuple: (compressed_matrix, scales) where scales is None for "float16".
+        """
+        normalized = torch.nn.functional.normalize(embeddings.float(), dim=1)
+        if storage == "float16":
+            return normalized.half(), None
+        if storage == "int8":
+            scales = normalized.abs().amax(dim=1).clamp(min=1e-12) / 127.0
+            quantized = torch.round(normalized / scales.unsqueeze(1)).to(torch.int8)
+            return quantized, scales
+        raise ValueError(f"Cannot quantize to storage mode '{storage}'.")
+
+    def memory_usage(self):
+        """
+        Report the memory held by the concept and fact embedding matrices.
+
+        Returns:
+            dict: Byte counts for concepts, facts and their total, plus the size the same
+                  matrices would take at float32 for comparison. exact_bytes is the size of the
+                  memory-mapped rescoring vectors, which are paged in on demand and not counted in total_bytes.
+        """
+        def nbytes(tensor):
+            return 0 if tensor is None else tensor.element_size() * tensor.nelement()
+
+        concept_bytes = nbytes(self.concept_embeddings) + nbytes(self.concept_scales)
+        fact_bytes = nbytes(self.fact_embeddings) + nbytes(self.fact_scales)
+        float32_bytes = sum(
+            4 * tensor.nelement() for tensor in (self.concept_embeddings, self.fact_embeddings) if tensor is not None
+        )
+        return {
+            "concept_bytes": concept_bytes,
+            "fact_bytes": fact_bytes,
+            "total_bytes": concept_bytes + fact_bytes,
+            "float32_bytes": float32_bytes,
+            "exact_bytes": nbytes(self.concept_exact) + nbytes(self.fact_exact),
+        }
+
+    def _score(self, query_embeddings, embeddings, scales):
+        """
+        Compute similarity scores between query embeddings and a stored (possibly compressed) matrix.
+
+        Parameters:
+            query_embeddings (torch.Tensor): A (m, dim) matrix of query embeddings.
+            embeddings (torch.Tensor): The stored (n, dim) matrix.
+            scales (torch.Tensor or None): Per-row scales for an int8 matrix.
+
+        Returns:
+            torch.Tensor: A (m, n) matrix of cosine similarities (approximate when compressed).
+        """
+        if self.storage == "float32" and not self.normalized:
+            return util.cos_sim(query_embeddings, embeddings)
+        queries = torch.nn.functional.normalize(query_embeddings.float(), dim=1).to(embeddings.device)
+        if self.storage == "float32":
+            # Normalized rows: a plain product is the cosine similarity and reads the matrix in place.
+            return queries @ embeddings.T
+        blocks = []
+        for start in range(0, embeddings.shape[0], SCORE_BLOCK_ROWS):
+            block = queries @ embeddings[start:start + SCORE_BLOCK_ROWS].float().T
+            if scales is not None:
+                block = block * scales[start:start + SCORE_BLOCK_ROWS].unsqueeze(0)
+            blocks.append(block)
+        if not blocks:
+            return queries.new_zeros((queries.shape[0], 0))
+        return torch.cat(blocks, dim=1)
+
+    @staticmethod
+    def fuse_scores(scores, fusion="max", rrf_k=60, rrf_top_n=100):
+        """
+        Fuse the per-observation scores of a (m, n) score matrix into a single ranking score per item.
+
+        Parameters:
+            scores (torch.Tensor): A (m, n) matrix, one row per observation.
+            fusion (str): "max" (best match of any observation), "mean" (average similarity), or
+                          "rrf" (reciprocal-rank fusion, sum of 1 / (rrf_k + rank)).
+            rrf_k (int): The damping constant for reciprocal-rank fusion.
+            rrf_top_n (int): Only each observation's top rrf_top_n items contribute to reciprocal-rank
+                             fusion; items ranked lower contribute zero.
+
+        Returns:
+            torch.Tensor: A (n,) vector of fused scores, higher is better.
+        """
+        if fusion == "max":
+            return scores.max(dim=0).values
+        if fusion == "mean":
+            return scores.mean(dim=0)
+        if fusion == "rrf":
+            top_n = min(rrf_top_n, scores.shape[1])
+            indices = torch.topk(scores, top_n, dim=1).indices
+            contributions = 1.0 / (rrf_k + torch.arange(1, top_n + 1, device=scores.device, dtype=torch.float32))
+            fused = torch.zeros(scores.shape[1], device=scores.device)
+            return fused.index_add_(0, indices.reshape(-1), contributions.repeat(scores.shape[0]))
+        raise ValueError(f"Unknown fusion method '{fusion}'. Expected 'max', 'mean' or 'rrf'.")
+
+    def _rank(self, observations, embeddings, scales, exact, top_k, fusion="max"):
+        """
+        Rank stored items against one or more observations and return the indices of the top-k.
+
+        All observations are encoded in one batch and scored in a single matrix product; the
+        per-observation scores are then fused. With compressed storage, the fused compressed scores
+        select a shortlist of rescore_k candidates, which are then rescored against their exact
+        float32 vectors.
+
+        Parameters:
+            observations (list): The text observations to compare against.
+            embeddings (torch.Tensor): The stored embedding matrix.
+            scales (torch.Tensor or None): Per-row scales for an int8 matrix.
+            exact (torch.Tensor or None): Normalized float32 vectors for rescoring compressed storage.
+            top_k (int): The number of indices to return.
+            fusion (str): How scores of several observations are combined (see fuse_scores).
+
+        Returns:
+            list: Indices into the stored matrix, ranked by semantic similarity.
+        """
+        obs_embeddings = self.model.encode(observations, convert_to_tensor=True)
+        scores = self.fuse_scores(self._score(obs_embeddings, embeddings, scales), fusion)
+        if self.storage == "float32":
+            return torch.topk(scores, min(top_k, scores.shape[0])).indices.tolist()
+        shortlist_size = min(max(top_k, self.rescore_k), scores.shape[0])
+        shortlist = torch.topk(scores, shortlist_size).indices
+        if exact is None:
+            return shortlist[:top_k].tolist()
+        queries = torch.nn.functional.normalize(obs_embeddings.float(), dim=1).to(exact.device)
+        exact_scores = self.fuse_scores(queries @ exact[shortlist.to(exact.device)].T, fusion)
+        order = torch.topk(exact_scores, min(top_k, exact_scores.shape[0])).indices
+        return shortlist[order.to(shortlist.device)].tolist()
+
+    def evaluate_recall(self, observations, top_k=5, target="facts"):
+        """
+        Measure how well the configured storage mode reproduces the exact float32 ranking.
+
+        The exact ranking is computed from the stored float32 vectors (the rescoring vectors when
+        storage is compressed), so no corpus text is re-encoded.
+
+        Parameters:
+            observations (list): Observation strings to use as queries.
+            top_k (int): The cut-off at which recall is computed.
+            target (str): Either "facts" or "concepts".
+
+        Returns:
+            float: Mean recall@top_k of the configured path against the exact path.
+        """
+        if target == "facts":
+            embeddings, scales, exact = self.fact_embeddings, self.fact_scales, self.fact_exact
+        elif target == "concepts":
+            embeddings, scales, exact = self.concept_embeddings, self.concept_scales, self.concept_exact
+        else:
+            raise ValueError(f"Unknown recall target '{target}'. Expected 'facts' or 'concepts'.")
+        if not observations or embeddings is None or embeddings.shape[0] == 0:
+            return 0.0
+        if self.storage != "float32" and exact is None:
+            raise ValueError("No exact vectors are available to compare against.")
+
+        obs_embeddings = self.model.encode(list(observations), convert_to_tensor=True)
+        if self.storage == "float32":
+            exact_scores = self._score(obs_embeddings, embeddings, scales)
+        else:
+            queries = torch.nn.functional.normalize(obs_embeddings.float(), dim=1).to(exact.device)
+            exact_scores = queries @ exact.T
+        k = min(top_k, exact_scores.shape[1])
+        expected_rows = torch.topk(exact_scores, k, dim=1).indices.tolist()
+        recalls = []
+        for observation, expected in zip(observations, expected_rows):
+            retrieved = set(self._rank([observation], embeddings, scales, exact, top_k))
+            recalls.append(len(set(expected) & retrieved) / len(expected))
+        recall = sum(recalls) / len(recalls)
+        logging.info("Recall@%d of '%s' storage on %s: %.3f", top_k, self.storage, target, recall)
+        return recall
+
     def get_related_concepts(self, observation, top_k=5):
         """
         Retrieve the top-k concepts that are semantically related to the given observation.
@@ -113,10 +675,10 @@ class EmbeddingEngine:
             list: A list of concept names, ranked by semantic similarity.
         """
         try:
-            obs_embedding = self.model.encode(observation, convert_to_tensor=True)
-            similarities = util.cos_sim(obs_embedding, self.concept_embeddings)[0]
-            ranked = sorted(zip(self.concepts, similarities), key=lambda x: -x[1])
-            return [concept for concept, score in ranked[:top_k]]
+            ranked = self._rank(
+                [observation], self.concept_embeddings, self.concept_scales, self.concept_exact, top_k
+            )
+            return [self.concepts[i] for i in ranked]
         except Exception as e:
             logging.error(f"Error computing related concepts: {e}")
             return []
@@ -133,14 +695,61 @@ class EmbeddingEngine:
             list: A list of fact strings, ranked by semantic similarity.
         """
         try:
-            obs_embedding = self.model.encode(observation, convert_to_tensor=True)
-            similarities = util.cos_sim(obs_embedding, self.fact_embeddings)[0]
-            ranked = sorted(zip(self.facts, similarities), key=lambda x: -x[1])
-            return [fact for fact, score in ranked[:top_k]]
+            ranked = self._rank([observation], self.fact_embeddings, self.fact_scales, self.fact_exact, top_k)
+            return [self.facts[i] for i in ranked]
         except Exception as e:
             logging.error(f"Error computing related facts: {e}")
             return []
 
+    def get_related_concepts_multi(self, observations, top_k=5, fusion="max"):
+        """
+        Retrieve the top-k concepts related to a set of observations, scoring each observation separately.
+
+        Unlike joining the observations into one string, every observation stays within the encoder's
+        maximum sequence length, and the per-observation rankings are fused.
+
+        Parameters:
+            observations (list): The text observations to compare against.
+            top_k (int): The number of top related concepts to return.
+            fusion (str): "max", "mean" or "rrf" (see fuse_scores).
+
+        Returns:
+            list: A list of concept names, ranked by fused semantic similarity.
+        """
+        if not observations:
+            return []
+        try:
+            ranked = self._rank(
+                list(observations), self.concept_embeddings, self.concept_scales, self.concept_exact, top_k, fusion
+            )
+            return [self.concepts[i] for i in ranked]
+        except Exception as e:
+            logging.error(f"Error computing related concepts for multiple observations: {e}")
+            return []
+
+    def get_related_facts_multi(self, observations, top_k=3, fusion="max"):
+        """
+        Retrieve the top-k facts related to a set of observations, scoring each observation separately.
+
+        Parameters:
+            observations (list): The text observations to compare against.
+            top_k (int): The number of top related facts to return.
+            fusion (str): "max", "mean" or "rrf" (see fuse_scores).
+
+        Returns:
+            list: A list of fact strings, ranked by fused semantic similarity.
+        """
+        if not observations:
+            return []
+        try:
+            ranked = self._rank(
+                list(observations), self.fact_embeddings, self.fact_scales, self.fact_exact, top_k, fusion
+            )
+            return [self.facts[i] for i in ranked]
+        except Exception as e:
+            logging.error(f"Error computing related facts for multiple observations: {e}")
+            return []
+
 if __name__ == "__main__":
     # For debugging: test the EmbeddingEngine with a sample observation.
     engine = EmbeddingEngine()
@@ -0,0 +1,404 @@
+# knowledge_store.py
+
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+
+# Configure logging for debugging and informational output.
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS concepts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    definition TEXT NOT NULL,
+    embedding BLOB
+);
+CREATE TABLE IF NOT EXISTS facts (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE,
+    embedding BLOB
+);
+CREATE TABLE IF NOT EXISTS rules (
+    id INTEGER PRIMARY KEY,
+    premise TEXT NOT NULL,
+    conclusion TEXT NOT NULL,
+    UNIQUE (premise, conclusion)
+);
+"""
+
+# Full-text indexes are kept in sync with the base tables through triggers.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(text, content='facts', content_rowid='id');
+CREATE VIRTUAL TABLE IF NOT EXISTS concepts_fts USING fts5(name, definition, content='concepts', content_rowid='id');
+
+CREATE TRIGGER IF NOT EXISTS facts_ai AFTER INSERT ON facts BEGIN
+    INSERT INTO facts_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS facts_ad AFTER DELETE ON facts BEGIN
+    INSERT INTO facts_fts(facts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS concepts_ai AFTER INSERT ON concepts BEGIN
+    INSERT INTO concepts_fts(rowid, name, definition) VALUES (new.id, new.name, new.definition);
+END;
+CREATE TRIGGER IF NOT EXISTS concepts_ad AFTER DELETE ON concepts BEGIN
+    INSERT INTO concepts_fts(concepts_fts, rowid, name, definition) VALUES ('delete', old.id, old.name, old.definition);
+END;
+CREATE TRIGGER IF NOT EXISTS concepts_au AFTER UPDATE OF name, definition ON concepts BEGIN
+    INSERT INTO concepts_fts(concepts_fts, rowid, name, definition) VALUES ('delete', old.id, old.name, old.definition);
+    INSERT INTO concepts_fts(rowid, name, definition) VALUES (new.id, new.name, new.definition);
+END;
+"""
+
+class KnowledgeStore:
+    """
+    A transactional SQLite store for concepts, facts and rules.
+
+    The database runs in WAL mode so that several processes can append facts concurrently while
+    others read. Within one process, threads sharing a store take turns on its connection.
+    Unique constraints deduplicate concepts, facts and rules, writes are batched in a single
+    transaction, facts and concepts are indexed for full-text search, and computed embeddings
+    can be stored next to the text they were computed from.
+
+    The store can import from and export to the plain-text formats used in the data/ folder.
+    """
+    def __init__(self, db_path="data/knowledge.db", timeout=30.0):
+        """
+        Open (and if necessary create) the knowledge store.
+
+        Parameters:
+            db_path (str): Path to the SQLite database file.
+            timeout (float): Seconds to wait for a lock held by another writer.
+        """
+        self.db_path = db_path
+        # Transactions are managed explicitly (see _transaction), hence isolation_level=None.
+        self.conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        # The connection is shared between threads, so only one of them may hold a transaction on it.
+        self._lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError as e:
+            logging.warning(f"Full-text search unavailable in this SQLite build: {e}")
+            self.full_text = False
+        logging.info("Knowledge store opened at %s", db_path)
+
+    def close(self):
+        """Close the underlying database connection."""
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Run a block of writes in one transaction.
+
+        BEGIN IMMEDIATE takes the write lock up front, so concurrent writers in other processes
+        queue on the busy timeout instead of failing when upgrading a read lock. Threads sharing
+        this store queue on a lock, so they never nest or roll back each other's transactions.
+        """
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def add_facts(self, facts):
+        """
+        Insert facts in one transaction, ignoring ones that already exist.
+
+        Parameters:
+            facts (list): Fact strings to add.
+
+        Returns:
+            int: The number of facts that were newly inserted.
+        """
+        facts = [fact.strip() for fact in facts if fact and fact.strip()]
+        with self._transaction() as conn:
+            cursor = conn.executemany("INSERT OR IGNORE INTO facts (text) VALUES (?)", [(fact,) for fact in facts])
+            added = cursor.rowcount
+        logging.info("Added %d of %d facts to the knowledge store.", added, len(facts))
+        return added
+
+    def add_concepts(self, concepts):
+        """
+        Insert or update concepts in one transaction.
+
+        A changed definition replaces the stored one and clears its cached embedding.
+
+        Parameters:
+            concepts (list): (name, definition) tuples.
+
+        Returns:
+            int: The number of concepts that were inserted or changed.
+        """
+        with self._transaction() as conn:
+            cursor = conn.executemany(
+                "INSERT INTO concepts (name, definition) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET definition = excluded.definition, embedding = NULL "
+                "WHERE definition != excluded.definition",
+                [(name.strip(), definition.strip()) for name, definition in concepts]
+            )
+            changed = cursor.rowcount
+        logging.info("Added or updated %d of %d concepts in the knowledge store.", changed, len(concepts))
+        return changed
+
+    def add_rules(self, rules):
+        """
+        Insert rules in one transaction, ignoring ones that already exist.
+
+        Parameters:
+            rules (list): (premise, conclusion) tuples.
+
+        Returns:
+            int: The number of rules that were newly inserted.
+        """
+        with self._transaction() as conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO rules (premise, conclusion) VALUES (?, ?)",
+                [(premise.strip(), conclusion.strip()) for premise, conclusion in rules]
+            )
+            added = cursor.rowcount
+        logging.info("Added %d of %d rules to the knowledge store.", added, len(rules))
+        return added
+
+    def remove_rules(self, rules):
+        """
+        Delete rules in one transaction.
+
+        Parameters:
+            rules (list): (premise, conclusion) tuples.
+
+        Returns:
+            int: The number of rules that were deleted.
+        """
+        with self._transaction() as conn:
+            cursor = conn.executemany(
+                "DELETE FROM rules WHERE premise = ? AND conclusion = ?",
+                [(premise.strip(), conclusion.strip()) for premise, conclusion in rules]
+            )
+            removed = cursor.rowcount
+        logging.info("Removed %d of %d rules from the knowledge store.", removed, len(rules))
+        return removed
+
+    def get_facts(self):
+        """
+        Return all facts in insertion order.
+
+        Returns:
+            list: A list of fact strings.
+        """
+        return [row[0] for row in self.conn.execute("SELECT text FROM facts ORDER BY id")]
+
+    def get_concepts(self):
+        """
+        Return all concepts in insertion order.
+
+        Returns:
+            tuple: Two lists - one containing concept names and the other containing definitions.
+        """
+        rows = self.conn.execute("SELECT name, definition FROM concepts ORDER BY id").fetchall()
+        return [name for name, _ in rows], [definition for _, definition in rows]
+
+    def get_rules(self):
+        """
+        Return all rules in insertion order.
+
+        Returns:
+            list of tuple: A list of (premise, conclusion) tuples.
+        """
+        return [tuple(row) for row in self.conn.execute("SELECT premise, conclusion FROM rules ORDER BY id")]
+
+    @staticmethod
+    def _words(query):
+        """Split a plain-text search query into its whitespace-separated words."""
+        return query.split()
+
+    @staticmethod
+    def _fts_query(words):
+        """
+        Turn plain-text words into an FTS5 query that matches rows containing all of them.
+
+        Each word is quoted as an FTS5 phrase, so apostrophes, hyphens and parentheses in scientific
+        text are matched literally instead of being parsed as query syntax.
+        """
+        return " ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+    @staticmethod
+    def _like_pattern(word):
+        """Build a LIKE pattern that matches word literally anywhere in a column."""
+        escaped = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"%{escaped}%"
+
+    def search_facts(self, query, limit=10):
+        """
+        Full-text search over the stored facts.
+
+        Parameters:
+            query (str): Plain text, e.g. "Alzheimer's long-term potentiation". A fact matches when it
+                         contains every whitespace-separated word; no query syntax is interpreted.
+            limit (int): Maximum number of facts to return.
+
+        Returns:
+            list: Matching fact strings, best match first.
+        """
+        words = self._words(query)
+        if not words:
+            return []
+        if not self.full_text:
+            conditions = " AND ".join(["text LIKE ? ESCAPE '\\'"] * len(words))
+            params = [self._like_pattern(word) for word in words] + [limit]
+            rows = self.conn.execute(f"SELECT text FROM facts WHERE {conditions} ORDER BY id LIMIT ?", params)
+            return [row[0] for row in rows]
+        rows = self.conn.execute(
+            "SELECT facts.text FROM facts_fts JOIN facts ON facts.id = facts_fts.rowid "
+            "WHERE facts_fts MATCH ? ORDER BY rank LIMIT ?",
+            (self._fts_query(words), limit)
+        )
+        return [row[0] for row in rows]
+
+    def search_concepts(self, query, limit=10):
+        """
+        Full-text search over concept names and definitions.
+
+        Parameters:
+            query (str): Plain text, as for search_facts. A concept matches when every word appears
+                         in its name or definition.
+            limit (int): Maximum number of concepts to return.
+
+        Returns:
+            list: Matching concept names, best match first.
+        """
+        words = self._words(query)
+        if not words:
+            return []
+        if not self.full_text:
+            conditions = " AND ".join(["(name LIKE ? ESCAPE '\\' OR definition LIKE ? ESCAPE '\\')"] * len(words))
+            params = [pattern for word in words for pattern in (self._like_pattern(word),) * 2] + [limit]
+            rows = self.conn.execute(f"SELECT name FROM concepts WHERE {conditions} ORDER BY id LIMIT ?", params)
+            return [row[0] for row in rows]
+        rows = self.conn.execute(
+            "SELECT concepts.name FROM concepts_fts JOIN concepts ON concepts.id = concepts_fts.rowid "
+            "WHERE concepts_fts MATCH ? ORDER BY rank LIMIT ?",
+            (self._fts_query(words), limit)
+        )
+        return [row[0] for row in rows]
+
+    def _embedding_table(self, kind):
+        """Map an embedding kind to its (table, key column) pair."""
+        if kind == "facts":
+            return "facts", "text"
+        if kind == "concepts":
+            return "concepts", "name"
+        raise ValueError(f"Unknown embedding kind '{kind}'. Expected 'facts' or 'concepts'.")
+
+    def load_embeddings(self, kind):
+        """
+        Return the stored embedding blobs for facts or concepts.
+
+        Parameters:
+            kind (str): Either "facts" (keyed by fact text) or "concepts" (keyed by concept name).
+
+        Returns:
+            dict: Maps each key with a stored embedding to its raw float32 bytes.
+        """
+        table, key = self._embedding_table(kind)
+        rows = self.conn.execute(f"SELECT {key}, embedding FROM {table} WHERE embedding IS NOT NULL")
+        return {name: blob for name, blob in rows}
+
+    def save_embeddings(self, kind, items):
+        """
+        Store embedding blobs for facts or concepts in one transaction.
+
+        Parameters:
+            kind (str): Either "facts" or "concepts".
+            items (list): (key, bytes) tuples, where key is the fact text or concept name.
+        """
+        table, key = self._embedding_table(kind)
+        with self._transaction() as conn:
+            conn.executemany(
+                f"UPDATE {table} SET embedding = ? WHERE {key} = ?", [(blob, name) for name, blob in items]
+            )
+
+    def import_text_files(self, concept_file="data/concepts.txt", fact_file="data/facts.txt",
+                          rules_file="data/scientific_rules.txt"):
+        """
+        Import the plain-text datasets into the store.
+
+        The files are parsed with the same rules as EmbeddingEngine.load_concepts/load_facts and
+        SymbolicReasoner.load_rules. A missing file is logged and skipped.
+
+        Parameters:
+            concept_file (str): Path to the concepts file ("name: definition" per line).
+            fact_file (str): Path to the facts file (one fact per line).
+            rules_file (str): Path to the rules file ("premise => conclusion" per line).
+
+        Returns:
+            dict: The number of newly added concepts, facts and rules.
+        """
+        concepts, facts, rules = [], [], []
+        try:
+            with open(concept_file, 'r') as f:
+                for line in f:
+                    if ':' in line:
+                        name, definition = line.strip().split(':', 1)
+                        concepts.append((name, definition))
+        except Exception as e:
+            logging.error(f"Failed to import concepts from {concept_file}: {e}")
+        try:
+            with open(fact_file, 'r') as f:
+                facts = [line.strip() for line in f if line.strip()]
+        except Exception as e:
+            logging.error(f"Failed to import facts from {fact_file}: {e}")
+        try:
+            with open(rules_file, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and '=>' in line:
+                        parts = [part.strip() for part in line.split('=>')]
+                        if len(parts) == 2:
+                            rules.append(tuple(parts))
+                        else:
+                            logging.error(f"Error parsing rule line '{line}'")
+        except Exception as e:
+            logging.error(f"Failed to import rules from {rules_file}: {e}")
+
+        return {
+            "concepts": self.add_concepts(concepts),
+            "facts": self.add_facts(facts),
+            "rules": self.add_rules(rules),
+        }
+
+    def export_text_files(self, concept_file="data/concepts.txt", fact_file="data/facts.txt",
+                          rules_file="data/scientific_rules.txt"):
+        """
+        Write the store back out in the plain-text dataset formats.
+
+        Parameters:
+            concept_file (str): Destination for "name: definition" lines.
+            fact_file (str): Destination for one fact per line.
+            rules_file (str): Destination for "premise => conclusion" lines.
+        """
+        names, definitions = self.get_concepts()
+        with open(concept_file, 'w') as f:
+            f.writelines(f"{name}: {definition}\n" for name, definition in zip(names, definitions))
+        with open(fact_file, 'w') as f:
+            f.writelines(f"{fact}\n" for fact in self.get_facts())
+        with open(rules_file, 'w') as f:
+            f.writelines(f"{premise} => {conclusion}\n" for premise, conclusion in self.get_rules())
+        logging.info("Exported knowledge store to %s, %s and %s", concept_file, fact_file, rules_file)
+
+# For debugging: Import the text datasets into a database and run a sample search.
+if __name__ == "__main__":
+    store = KnowledgeStore("data/knowledge.db")
+    counts = store.import_text_files()
+    print(f"Imported: {counts}")
+    for fact in store.search_facts("hippocampal", limit=3):
+        print(f" - {fact}")
+    store.close()
@@ -35,12 +35,31 @@ def get_user_choice(options, prompt):
         except ValueError:
             print("Invalid input. Please enter a number.")
 
+def get_latency_budget(prompt):
+    """
+    Prompt the user for a per-abstract latency budget in seconds.
+
+    Parameters:
+        prompt (str): The prompt message to show for input.
+
+    Returns:
+        float: A positive number of seconds.
+    """
+    while True:
+        try:
+            budget = float(input(prompt))
+            if budget > 0:
+                return budget
+            print("Please enter a positive number of seconds.")
+        except ValueError:
+            print("Invalid input. Please enter a number of seconds.")
+
 def main():
     """
     Main function orchestrating the AI pipeline:
     
     1. User selects a neuroscience category and a corresponding subfield.
-    2. User provides search keywords to refine a PubMed query.
+    2. User provides search keywords to refine a PubMed query and chooses how observations are extracted.
     3. Articles are fetched from PubMed based on the query.
     4. Observations are extracted from the articles' abstracts.
     5. Neural processing retrieves related concepts and facts.
@@ -78,6 +97,17 @@ def main():
         encoded_query = urllib.parse.quote(final_query)
         print(f"\nYour final PubMed query is: '{final_query}'")
 
+        # User selects how observations are extracted: "abstractive" summarizes with BART,
+        # "extractive" picks key sentences with the embedding model and is much faster on a CPU,
+        # and "auto" chooses per abstract based on a latency budget.
+        print("\nSelect an observation extraction mode:")
+        observation_mode = get_user_choice(
+            ["abstractive", "extractive", "auto"], "Enter the number corresponding to your mode: "
+        )
+        latency_budget = None
+        if observation_mode == "auto":
+            latency_budget = get_latency_budget("Enter the time budget per abstract in seconds: ")
+
         # Step 4: Initialize the necessary modules.
         reasoner = SymbolicReasoner("data/scientific_rules.txt")
         embedder = EmbeddingEngine()
@@ -108,7 +138,9 @@ def main():
             if paper.get("abstract"):
                 if obs_count >= MAX_OBSERVATIONS:
                     break  # Limit the number of observations.
-                obs = extract_observations(paper["abstract"])
+                obs = extract_observations(
+                    paper["abstract"], mode=observation_mode, embedder=embedder, latency_budget=latency_budget
+                )
                 extracted_observations.append(obs)
                 obs_count += 1
                 print(f"Extracted Observation: {obs}")
@@ -119,9 +151,12 @@ def main():
         combined_observation = " ".join(extracted_observations) if extracted_observations else subfield
 
         # Step 7: Retrieve related concepts and facts using the embedding engine.
+        # Each observation is scored separately and the rankings are fused, so long
+        # observation sets are not truncated at the encoder's maximum sequence length.
         logging.info("Performing neural processing to retrieve related concepts and facts...")
-        top_concepts = embedder.get_related_concepts(combined_observation, top_k=5)
-        top_facts = embedder.get_related_facts(combined_observation, top_k=3)
+        query_observations = extracted_observations if extracted_observations else [subfield]
+        top_concepts = embedder.get_related_concepts_multi(query_observations, top_k=5, fusion="rrf")
+        top_facts = embedder.get_related_facts_multi(query_observations, top_k=3, fusion="rrf")
 
         print("Top Related Concepts:")
         for concept in top_concepts:
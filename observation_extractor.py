@@ -1,42 +1,142 @@
 # observation_extractor.py
 
 from transformers import pipeline
+from sentence_transformers import util
 import logging
+import re
 
 # Configure logging for debugging and informational output.
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 
-try:
-    # Initialize the summarization pipeline.
-    # This model is used to generate a concise summary (observation) from a given text.
-    summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-    logging.info("Summarization pipeline initialized successfully.")
-except Exception as e:
-    logging.error(f"Failed to initialize the summarization pipeline: {e}")
-    summarizer = None
+# Abstractive summarization takes seconds per abstract on a CPU; below this budget (in seconds),
+# "auto" mode falls back to extractive selection.
+ABSTRACTIVE_MIN_SECONDS = 5.0
 
-def extract_observations(text):
+# Sentences that report findings get a small boost over sentences that only set up background.
+RESULT_CUES = re.compile(
+    r"\b(we (found|show|observed|demonstrate)|results?|suggests?|indicates?|reveals?|demonstrates?|"
+    r"conclud\w*|significant(ly)?|associated with|led to|leads to)\b",
+    re.IGNORECASE
+)
+RESULT_CUE_BONUS = 0.1
+
+# The summarization pipeline is loaded on first use, so extractive-only runs never load BART.
+summarizer = None
+_summarizer_failed = False
+
+def get_summarizer():
+    """
+    Return the summarization pipeline, initializing it on first use.
+
+    Returns:
+        Pipeline or None: The 'facebook/bart-large-cnn' pipeline, or None if it failed to load.
+    """
+    global summarizer, _summarizer_failed
+    if summarizer is None and not _summarizer_failed:
+        try:
+            # This model is used to generate a concise summary (observation) from a given text.
+            summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+            logging.info("Summarization pipeline initialized successfully.")
+        except Exception as e:
+            logging.error(f"Failed to initialize the summarization pipeline: {e}")
+            _summarizer_failed = True
+    return summarizer
+
+def split_sentences(text):
+    """
+    Split a text into sentences on terminal punctuation followed by whitespace.
+
+    Parameters:
+        text (str): The input text.
+
+    Returns:
+        list: The non-empty sentences of the text, in order.
+    """
+    sentences = re.split(r"(?<=[.!?])\s+(?=[A-Z0-9(\[])", text.strip())
+    return [sentence.strip() for sentence in sentences if sentence.strip()]
+
+def extract_key_sentences(text, embedder, num_sentences=2):
+    """
+    Extract the most central, result-bearing sentences of a text.
+
+    All sentences are embedded in one batch with the embedder's already-loaded model. Each sentence
+    is scored by its cosine similarity to the centroid of all sentences, plus a small bonus when it
+    reports a finding. The top sentences are returned in their original order.
+
+    Parameters:
+        text (str): The input text (e.g., an abstract).
+        embedder: An object with a 'model' attribute for generating embeddings (e.g., EmbeddingEngine).
+        num_sentences (int): The number of sentences to keep.
+
+    Returns:
+        str: The selected sentences joined by spaces.
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= num_sentences:
+        return " ".join(sentences)
+    embeddings = embedder.model.encode(sentences, convert_to_tensor=True)
+    centroid = embeddings.mean(dim=0, keepdim=True)
+    similarities = util.cos_sim(centroid, embeddings)[0].tolist()
+    scores = [
+        similarity + (RESULT_CUE_BONUS if RESULT_CUES.search(sentence) else 0.0)
+        for sentence, similarity in zip(sentences, similarities)
+    ]
+    selected = sorted(range(len(sentences)), key=lambda i: -scores[i])[:num_sentences]
+    return " ".join(sentences[i] for i in sorted(selected))
+
+def extract_observations(text, mode="abstractive", embedder=None, num_sentences=2, latency_budget=None):
     """
-    Extract key observations from a given text using a summarization model.
-    
+    Extract key observations from a given text.
+
     This function processes the provided text (e.g., an abstract) and returns a summarized version
-    that highlights the main observation or conclusion. It leverages the 'facebook/bart-large-cnn'
-    summarization model.
+    that highlights the main observation or conclusion. Two modes are available:
+        - "abstractive": summarization with the 'facebook/bart-large-cnn' model.
+        - "extractive": selection of the most central sentences using the embedder's model
+          (see extract_key_sentences). Much faster, and needs no second model.
+    With mode "auto", extractive mode is used when an embedder is given and latency_budget is
+    below ABSTRACTIVE_MIN_SECONDS; otherwise abstractive mode is used.
 
     Parameters:
         text (str): The input text to summarize.
+        mode (str): "abstractive", "extractive" or "auto".
+        embedder: An object with a 'model' attribute, required for extractive mode.
+        num_sentences (int): The number of sentences kept in extractive mode.
+        latency_budget (float, optional): Seconds available for this extraction, used by "auto".
 
     Returns:
         str: A summarized observation extracted from the text. If summarization fails, returns an error message.
-    
+
     Raises:
-        ValueError: If the summarization pipeline is not initialized.
+        ValueError: If the summarization pipeline is not initialized, if extractive mode is requested
+                    without an embedder, or if the mode is unknown.
     """
-    if not summarizer:
+    if mode == "auto":
+        fast = embedder is not None and latency_budget is not None and latency_budget < ABSTRACTIVE_MIN_SECONDS
+        mode = "extractive" if fast else "abstractive"
+
+    if mode == "extractive":
+        if embedder is None:
+            error_msg = "Extractive observation mode requires an embedder."
+            logging.error(error_msg)
+            raise ValueError(error_msg)
+        try:
+            observation = extract_key_sentences(text, embedder, num_sentences)
+            logging.info("Observation extracted successfully.")
+            return observation
+        except Exception as e:
+            logging.error(f"Error during extractive selection: {e}")
+            return "Error extracting observation."
+
+    if mode != "abstractive":
+        error_msg = f"Unknown observation mode '{mode}'. Expected 'abstractive', 'extractive' or 'auto'."
+        logging.error(error_msg)
+        raise ValueError(error_msg)
+
+    if not get_summarizer():
         error_msg = "Summarization pipeline is not initialized."
         logging.error(error_msg)
         raise ValueError(error_msg)
-    
+
     try:
         # Adjust max_length and min_length parameters as needed based on expected abstract size.
         summary = summarizer(text, max_length=50, min_length=25, do_sample=False)
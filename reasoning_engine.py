@@ -13,34 +13,199 @@ matplotlib.use("TkAgg")
 import networkx as nx
 import matplotlib.pyplot as plt
 from sentence_transformers import util
+from collections import OrderedDict
+import hashlib
 import logging
+import shelve
+import json
+import time
 
 # Configure logging to output debug and informational messages with timestamps.
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 
+class ExplanationCache:
+    """
+    A memoization layer for SymbolicReasoner.select_best_explanation.
+
+    Results are kept in an in-memory LRU of bounded size. If a path is given, results are also
+    written to a shelve database on disk, which is consulted on a memory miss, so they survive
+    restarts. Keys include a rule-base version stamp, so results computed against other rules
+    never match. Entries can also be tagged with the concepts they depend on and invalidated
+    selectively with invalidate().
+    """
+    def __init__(self, max_size=128, path=None):
+        """
+        Initialize the cache.
+
+        Parameters:
+            max_size (int): Maximum number of results kept in memory.
+            path (str, optional): Path of a shelve database used as the disk tier.
+        """
+        self.max_size = max_size
+        self.memory = OrderedDict()
+        self.tags = {}
+        self.disk = shelve.open(path) if path else None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(concept_list, known_facts, user_input, rules_version, depth=3, mode="exhaustive", model=None):
+        """
+        Build a cache key from the inputs of select_best_explanation.
+
+        The facts are hashed as a sorted list because chain scores do not depend on their order.
+
+        Parameters:
+            concept_list (list): Concept names, in the order they are explored.
+            known_facts (list): Known facts used for scoring.
+            user_input (str): The user input used for semantic similarity scoring.
+            rules_version (str): Version stamp of the rule base.
+            depth (int): The maximum chain length searched.
+            mode (str): The search mode, "exhaustive" or "anytime"; they order chains differently.
+            model (str, optional): Name of the embedding model used for semantic similarity scoring.
+
+        Returns:
+            str: A hex digest identifying the inputs.
+        """
+        facts_hash = hashlib.sha256("\n".join(sorted(known_facts)).encode("utf-8")).hexdigest()
+        payload = json.dumps([list(concept_list), facts_hash, user_input, rules_version, depth, mode, model])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def freeze(result):
+        """
+        Convert a (best_chain, best_score, all_chains) result into nested tuples for storage.
+
+        Cached values are immutable, so a caller modifying a returned chain cannot alter later hits.
+        """
+        best_chain, best_score, all_chains = result
+        frozen_best = tuple(best_chain) if best_chain is not None else None
+        return frozen_best, best_score, tuple((tuple(chain), score) for chain, score in all_chains)
+
+    @staticmethod
+    def thaw(result):
+        """
+        Convert a stored result back into fresh lists, as returned by select_best_explanation.
+        """
+        best_chain, best_score, all_chains = result
+        fresh_best = list(best_chain) if best_chain is not None else None
+        return fresh_best, best_score, [(list(chain), score) for chain, score in all_chains]
+
+    def get(self, key):
+        """
+        Look up a result, promoting disk hits into memory.
+
+        Parameters:
+            key (str): A key built by make_key.
+
+        Returns:
+            The cached result, or None on a miss.
+        """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return self.memory[key]
+        if self.disk is not None and key in self.disk:
+            value = self.disk[key]
+            self._remember(key, value)
+            self.hits += 1
+            return value
+        self.misses += 1
+        return None
+
+    def put(self, key, value, concepts=None):
+        """
+        Store a result in memory and, if configured, on disk.
+
+        Parameters:
+            key (str): A key built by make_key.
+            value: The result to store.
+            concepts (list, optional): Concepts the result depends on, used by invalidate().
+        """
+        self._remember(key, value)
+        if concepts is not None:
+            self.tags[key] = frozenset(concepts)
+        if self.disk is not None:
+            self.disk[key] = value
+
+    def _remember(self, key, value):
+        """Insert into the in-memory LRU, evicting the least recently used entry if full."""
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            evicted, _ = self.memory.popitem(last=False)
+            self.tags.pop(evicted, None)
+
+    def invalidate(self, concepts):
+        """
+        Drop the in-memory entries that depend on any of the given concepts.
+
+        Disk entries are left alone; their keys carry the version stamps of their concepts.
+
+        Parameters:
+            concepts (set): Concept names whose explanations changed.
+
+        Returns:
+            int: The number of entries dropped.
+        """
+        stale = [key for key, tagged in self.tags.items() if tagged & concepts]
+        for key in stale:
+            self.memory.pop(key, None)
+            del self.tags[key]
+        return len(stale)
+
+    def clear(self):
+        """Drop all in-memory entries. Disk entries are left alone; their keys carry the rule version."""
+        self.memory.clear()
+        self.tags.clear()
+
+    def close(self):
+        """Close the disk tier, if any."""
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
 class SymbolicReasoner:
     """
     A symbolic reasoning engine that uses a rule-based approach to generate explanations.
     It loads rules from a file, constructs a directed graph, and then performs reasoning
     by tracing paths through the graph.
     """
-    def __init__(self, rules_path):
+    def __init__(self, rules_path, store=None, cache_size=128, cache_path=None):
         """
         Initialize the SymbolicReasoner.
         
         Parameters:
             rules_path (str): Path to a text file containing rules. Each line should have
                               the format: premise => conclusion
+            store (KnowledgeStore, optional): Read the rules from this store instead of rules_path.
+            cache_size (int): Number of explanation results kept in memory. 0 disables caching.
+            cache_path (str, optional): Path of a shelve database that persists cached explanations.
         """
-        self.rules = self.load_rules(rules_path)
+        self.store = store
+        # Insertion-ordered map from each (premise, conclusion) rule to the number of times it was
+        # loaded, so membership checks and deletions in add_rules/remove_rules are O(1).
+        self._rule_counts = {}
+        for rule in self.load_rules(rules_path):
+            self._rule_counts[rule] = self._rule_counts.get(rule, 0) + 1
+        self._rules_view = None
         self.graph = self.build_graph()
+        self.premises_by_conclusion = self.build_index()
+        self.rules_version = self.compute_rules_version()
+        # Version stamp of the rules as loaded; node_versions records, per concept, the stamp at
+        # which its explanations last changed through add_rules/remove_rules.
+        self.loaded_rules_version = self.rules_version
+        self.node_versions = {}
+        self.cache = ExplanationCache(cache_size, cache_path) if cache_size > 0 else None
+        self.last_search_stats = None
 
     def load_rules(self, path):
         """
         Load the rules from a given file.
         
         Reads each line from the file, parses it to extract the premise and conclusion,
-        and stores the rules as a list of tuples.
+        and stores the rules as a list of tuples. If the reasoner was given a knowledge store,
+        the rules are read from the store and path is ignored.
         
         Parameters:
             path (str): Path to the file containing rules.
@@ -48,6 +213,13 @@ class SymbolicReasoner:
         Returns:
             list of tuple: A list where each element is a (premise, conclusion) tuple.
         """
+        if self.store is not None:
+            try:
+                return self.store.get_rules()
+            except Exception as e:
+                logging.error(f"Failed to load rules from the knowledge store: {e}")
+                return []
+
         rules = []
         try:
             with open(path, 'r') as f:
@@ -64,6 +236,23 @@ class SymbolicReasoner:
             logging.error(f"Failed to load rules from {path}: {e}")
         return rules
 
+    @property
+    def rules(self):
+        """
+        The loaded rules, as a read-only tuple of (premise, conclusion) tuples in load order.
+
+        A rule loaded several times appears as often. The tuple is rebuilt only after the rules
+        change; use add_rules and remove_rules to modify them.
+
+        Returns:
+            tuple: The (premise, conclusion) rules.
+        """
+        if self._rules_view is None:
+            self._rules_view = tuple(
+                rule for rule, count in self._rule_counts.items() for _ in range(count)
+            )
+        return self._rules_view
+
     def build_graph(self):
         """
         Build a directed graph from the loaded rules.
@@ -79,6 +268,165 @@ class SymbolicReasoner:
         logging.info("Graph built with %d nodes and %d edges", G.number_of_nodes(), G.number_of_edges())
         return G
 
+    def build_index(self):
+        """
+        Index the rules by conclusion.
+
+        Returns:
+            dict: Maps each conclusion to the list of its premises, in rule order. A rule loaded
+                  several times contributes its premise as often, as when the rules were scanned.
+        """
+        index = {}
+        for (premise, conclusion), count in self._rule_counts.items():
+            index.setdefault(conclusion, []).extend([premise] * count)
+        return index
+
+    def add_rules(self, rules):
+        """
+        Add rules to the reasoner in place.
+
+        The rule map, graph and conclusion index are updated directly, and only cached
+        explanations of concepts downstream of the new edges are invalidated. Rules that are
+        already present are ignored. If the reasoner was built from a knowledge store, the rules
+        are written to it as well.
+
+        Parameters:
+            rules (list): (premise, conclusion) tuples.
+
+        Returns:
+            int: The number of rules that were added.
+        """
+        added = []
+        for premise, conclusion in rules:
+            rule = (premise.strip(), conclusion.strip())
+            if rule in self._rule_counts:
+                continue
+            added.append(rule)
+            self._rule_counts[rule] = 1
+            self.graph.add_edge(*rule)
+            self.premises_by_conclusion.setdefault(rule[1], []).append(rule[0])
+        if added:
+            self._rules_view = None
+            if self.store is not None:
+                self.store.add_rules(added)
+            # Descendants are collected after the edges exist, so chains through them are covered.
+            self._rules_changed("+", added, self._downstream(conclusion for _, conclusion in added))
+        return len(added)
+
+    def remove_rules(self, rules):
+        """
+        Retract rules from the reasoner in place.
+
+        The rule map, graph and conclusion index are updated directly, and only cached
+        explanations of concepts downstream of the removed edges are invalidated. Concepts left
+        without any rule are dropped from the graph. If the reasoner was built from a knowledge
+        store, the rules are deleted from it as well.
+
+        Parameters:
+            rules (list): (premise, conclusion) tuples.
+
+        Returns:
+            int: The number of distinct rules that were removed.
+        """
+        removed = {}
+        for premise, conclusion in rules:
+            rule = (premise.strip(), conclusion.strip())
+            if rule in self._rule_counts:
+                removed[rule] = None
+        removed = list(removed)
+        if not removed:
+            return 0
+
+        # Descendants are collected before the edges go, while chains through them still exist.
+        affected = self._downstream(conclusion for _, conclusion in removed)
+        for premise, conclusion in removed:
+            del self._rule_counts[(premise, conclusion)]
+            premises = [p for p in self.premises_by_conclusion[conclusion] if p != premise]
+            if premises:
+                self.premises_by_conclusion[conclusion] = premises
+            else:
+                del self.premises_by_conclusion[conclusion]
+            self.graph.remove_edge(premise, conclusion)
+            for node in (premise, conclusion):
+                if node in self.graph and self.graph.degree(node) == 0:
+                    self.graph.remove_node(node)
+        self._rules_view = None
+        if self.store is not None:
+            self.store.remove_rules(removed)
+        self._rules_changed("-", removed, affected)
+        return len(removed)
+
+    def _downstream(self, nodes):
+        """
+        Collect the given concepts and all of their descendants in the rule graph.
+
+        Explanations trace rules backwards from a target, so a changed edge into a concept can only
+        affect the explanations of that concept and of the concepts it leads to.
+
+        Parameters:
+            nodes (iterable): Concept names.
+
+        Returns:
+            set: The concepts whose explanations may depend on edges into the given concepts.
+        """
+        affected = set()
+        stack = [node for node in nodes if node in self.graph]
+        while stack:
+            node = stack.pop()
+            if node in affected:
+                continue
+            affected.add(node)
+            stack.extend(self.graph.successors(node))
+        return affected
+
+    def _rules_changed(self, operation, rules, affected):
+        """
+        Advance the rule-base version and invalidate cached explanations of the affected concepts.
+
+        The new version is derived from the previous one and the change, so the same sequence of
+        changes always yields the same stamps and disk-cached results stay reusable across runs.
+
+        Parameters:
+            operation (str): "+" for added rules, "-" for removed rules.
+            rules (list): The (premise, conclusion) tuples that changed.
+            affected (set): Concepts whose explanations may have changed.
+        """
+        digest = hashlib.sha256(self.rules_version.encode("utf-8"))
+        for premise, conclusion in rules:
+            digest.update(f"{operation}{premise}=>{conclusion}\n".encode("utf-8"))
+        self.rules_version = digest.hexdigest()
+        for node in affected:
+            self.node_versions[node] = self.rules_version
+        dropped = self.cache.invalidate(affected) if self.cache is not None else 0
+        logging.info(
+            "Applied %d rule change(s); invalidated %d concept(s) and %d cached explanation(s).",
+            len(rules), len(affected), dropped
+        )
+
+    def _explanation_version(self, concept_list):
+        """
+        Version stamp of the rules that explanations for the given concepts depend on.
+
+        Parameters:
+            concept_list (list): Concept names.
+
+        Returns:
+            str: A stamp that changes only when a rule upstream of one of the concepts changes.
+        """
+        return json.dumps([self.loaded_rules_version] + [self.node_versions.get(c, "") for c in concept_list])
+
+    def compute_rules_version(self):
+        """
+        Compute a version stamp for the current rule base.
+
+        Returns:
+            str: A hex digest of the rules, in order.
+        """
+        digest = hashlib.sha256()
+        for (premise, conclusion), count in self._rule_counts.items():
+            digest.update(f"{premise}=>{conclusion}\n".encode("utf-8") * count)
+        return digest.hexdigest()
+
     def explain(self, target, depth=3):
         """
         Generate all possible explanations for a target concept by recursively tracing rules.
@@ -109,19 +457,13 @@ class SymbolicReasoner:
         """
         if depth == 0:
             return  # Base case: maximum depth reached, stop recursion.
-        found = False
-        # Iterate over each rule to see if it concludes to the current target.
-        for premise, conclusion in self.rules:
-            if conclusion == target:
-                # Build a new chain by adding this rule.
-                new_path = [(premise, conclusion)] + current_path
-                all_paths.append(new_path)
-                # Recursively trace back using the premise as the new target.
-                self._trace_explanation(premise, new_path, all_paths, depth - 1)
-                found = True
-        if not found:
-            # If no rule leads to the target, this branch terminates.
-            return
+        # Look up each rule that concludes to the current target.
+        for premise in self.premises_by_conclusion.get(target, []):
+            # Build a new chain by adding this rule.
+            new_path = [(premise, target)] + current_path
+            all_paths.append(new_path)
+            # Recursively trace back using the premise as the new target.
+            self._trace_explanation(premise, new_path, all_paths, depth - 1)
 
     def connect_concepts(self, concepts):
         """
@@ -181,15 +523,29 @@ class SymbolicReasoner:
         score = 0.5 * len(chain) + 1.0 * fact_match + 2.0 * sim_score
         return score
 
-    def select_best_explanation(self, concept_list, known_facts, user_input, embedder):
+    def select_best_explanation(self, concept_list, known_facts, user_input, embedder, use_cache=True,
+                                depth=3, time_budget=None, max_chains=None):
         """
         Evaluate all possible reasoning chains generated from a list of concepts and select the best one.
+
+        Results are memoized by the concept list, the known facts, the user input, the depth and the
+        rule-base version, so repeated queries skip chain enumeration and scoring.
+
+        If time_budget or max_chains is given, the search runs in anytime mode: chains are scored
+        in order of promise (see _iter_chains_by_promise) and the search stops cleanly when the
+        budget runs out, returning the best chain found so far. How much of the search space was
+        covered is logged and stored in self.last_search_stats.
         
         Parameters:
-            concept_list (list): List of concept names (strings) to generate explanations for.
+            concept_list (list): List of concept names (strings) to generate explanations for,
+                                 most promising first.
             known_facts (list): List of known facts for additional scoring.
             user_input (str): The original user input for semantic similarity scoring.
             embedder: An object with a 'model' attribute for generating embeddings.
+            use_cache (bool): Whether to consult and fill the explanation cache.
+            depth (int): The maximum length of a reasoning chain.
+            time_budget (float, optional): Wall-clock budget in seconds for the search.
+            max_chains (int, optional): Maximum number of chains to score.
         
         Returns:
             tuple: (best_chain, best_score, all_chains)
@@ -197,23 +553,125 @@ class SymbolicReasoner:
                    best_score: The score of the best chain.
                    all_chains: A list of all chains paired with their respective scores.
         """
+        start = time.perf_counter()
+        anytime = time_budget is not None or max_chains is not None
+        cache_key = None
+        if use_cache and self.cache is not None:
+            # Anytime and exhaustive searches order chains differently, so ties may resolve
+            # differently; their results are cached separately.
+            cache_key = ExplanationCache.make_key(
+                concept_list, known_facts, user_input, self._explanation_version(concept_list), depth,
+                "anytime" if anytime else "exhaustive",
+                getattr(embedder, "model_name", None) or type(embedder.model).__name__
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                best_chain, best_score, all_chains = ExplanationCache.thaw(cached)
+                self.last_search_stats = self._search_stats(concept_list, all_chains, True, start)
+                logging.info("Returning cached best chain with score: %.2f", best_score)
+                return best_chain, best_score, all_chains
+
         best_chain = None
         best_score = -1
         all_chains = []
+        complete = True
 
-        # Iterate over each concept and generate explanation chains.
-        for concept in concept_list:
-            chains = self.explain(concept)
-            for chain in chains:
+        if not anytime:
+            # Iterate over each concept and generate explanation chains.
+            for concept in concept_list:
+                chains = self.explain(concept, depth)
+                for chain in chains:
+                    score = self.score_chain(chain, known_facts, user_input, embedder)
+                    all_chains.append((chain, score))
+                    if score > best_score:
+                        best_score = score
+                        best_chain = chain
+        else:
+            deadline = start + time_budget if time_budget is not None else None
+            for chain in self._iter_chains_by_promise(concept_list, known_facts, depth):
+                # Stop before scoring another chain once either budget is exhausted.
+                if (deadline is not None and time.perf_counter() >= deadline) or \
+                        (max_chains is not None and len(all_chains) >= max_chains):
+                    complete = False
+                    break
                 score = self.score_chain(chain, known_facts, user_input, embedder)
                 all_chains.append((chain, score))
                 if score > best_score:
                     best_score = score
                     best_chain = chain
 
+        self.last_search_stats = self._search_stats(concept_list, all_chains, complete, start)
         logging.info("Selected best chain with score: %.2f", best_score)
+        if not complete:
+            logging.info(
+                "Search stopped at budget after %d chains (depth %d, %d/%d concepts) in %.2fs.",
+                self.last_search_stats["chains_scored"], self.last_search_stats["depth_reached"],
+                self.last_search_stats["concepts_explored"], self.last_search_stats["concepts_total"],
+                self.last_search_stats["elapsed"]
+            )
+        # Only complete results are cached; a partial search depends on timing.
+        if cache_key is not None and complete:
+            self.cache.put(
+                cache_key, ExplanationCache.freeze((best_chain, best_score, all_chains)), concepts=concept_list
+            )
         return best_chain, best_score, all_chains
 
+    def _iter_chains_by_promise(self, concept_list, known_facts, depth):
+        """
+        Lazily enumerate explanation chains for several concepts, most promising first.
+
+        Chains are produced breadth-first, so all short chains come before longer ones. Within a
+        level, concepts keep their order in concept_list, and premises mentioned in more known
+        facts are expanded first. The premises come from the same conclusion index as explain(),
+        so a complete run yields the same chains as the exhaustive search, in a different order.
+
+        Parameters:
+            concept_list (list): Concept names, most promising first.
+            known_facts (list): Known facts used to rank premises.
+            depth (int): The maximum length of a chain.
+
+        Yields:
+            list: A reasoning chain as a list of (premise, conclusion) tuples.
+        """
+        fact_hits = {}
+
+        def promise(node):
+            if node not in fact_hits:
+                fact_hits[node] = sum(1 for f in known_facts if node in f)
+            return fact_hits[node]
+
+        # Each entry is a chain together with the concept it currently starts from.
+        level = [([], concept) for concept in concept_list]
+        for _ in range(depth):
+            next_level = []
+            for chain, target in level:
+                premises = self.premises_by_conclusion.get(target, [])
+                for premise in sorted(premises, key=lambda node: -promise(node)):
+                    new_chain = [(premise, target)] + chain
+                    yield new_chain
+                    next_level.append((new_chain, premise))
+            if not next_level:
+                return
+            level = next_level
+
+    @staticmethod
+    def _search_stats(concept_list, all_chains, complete, start):
+        """
+        Summarize how much of the search space a call to select_best_explanation covered.
+
+        Returns:
+            dict: complete, chains_scored, depth_reached, concepts_explored, concepts_total and elapsed seconds.
+        """
+        explored = {chain[-1][1] for chain, _ in all_chains if chain}
+        return {
+            "complete": complete,
+            "chains_scored": len(all_chains),
+            "depth_reached": max((len(chain) for chain, _ in all_chains), default=0),
+            "concepts_explored": len(explored & set(concept_list)),
+            "concepts_total": len(concept_list),
+            "elapsed": time.perf_counter() - start,
+        }
+
 def explain_chain_naturally(chain):
     """
     Convert a reasoning chain into a human-readable explanation.